@@ -0,0 +1,122 @@
+import argparse
+import glob
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+# Allow running as `python benchmarks/bench_extraction.py` from chatbot-python/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from extraction import EXTRACTORS
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Compare professor page extractors on saved HTML fixtures")
+    parser.add_argument("--fixtures", default=FIXTURES_DIR, help="Directory of saved professor pages (*.html)")
+    parser.add_argument("--iterations", type=int, default=50, help="Passes over the fixtures per extractor")
+    parser.add_argument("--measure-rss", choices=sorted(EXTRACTORS), help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+def load_fixtures(directory):
+    pages = {}
+    for path in sorted(glob.glob(os.path.join(directory, "*.html"))):
+        with open(path, encoding="utf-8") as f:
+            pages[os.path.basename(path)] = f.read()
+    return pages
+
+
+def run_extractor(extractor, pages):
+    results = {}
+    for name, html_content in pages.items():
+        try:
+            results[name] = extractor(html_content)
+        except (AttributeError, IndexError) as e:
+            results[name] = f"{type(e).__name__}"
+    return results
+
+
+def check_identical(pages):
+    # Every extractor must produce exactly what the BeautifulSoup extractor produces
+    expected = run_extractor(EXTRACTORS["soup"], pages)
+    mismatches = []
+    for extractor_name, extractor in EXTRACTORS.items():
+        actual = run_extractor(extractor, pages)
+        for page_name in pages:
+            if actual[page_name] != expected[page_name]:
+                mismatches.append((extractor_name, page_name, expected[page_name], actual[page_name]))
+    return mismatches
+
+
+def max_rss_kib():
+    # On Linux ru_maxrss keeps the parent's peak across fork/exec, so prefer the
+    # per-process high-water mark; ru_maxrss is in KiB on Linux but bytes on macOS
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return max_rss / 1024 if sys.platform == "darwin" else max_rss
+
+
+def measure_rss(extractor_name, fixtures):
+    # Runs one pass in a fresh interpreter so the peak covers this extractor alone,
+    # including memory allocated in C by lxml that tracemalloc cannot see
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--fixtures", fixtures, "--measure-rss", extractor_name],
+        check=True, capture_output=True, text=True,
+    ).stdout
+    result = json.loads(output)
+    return result["peak_kib"], result["peak_kib"] - result["baseline_kib"]
+
+
+def measure(extractor_name, pages, iterations, fixtures):
+    extractor = EXTRACTORS[extractor_name]
+    start = time.perf_counter()
+    for _ in range(iterations):
+        run_extractor(extractor, pages)
+    elapsed = time.perf_counter() - start
+
+    peak, growth = measure_rss(extractor_name, fixtures)
+    return len(pages) * iterations / elapsed, peak, growth
+
+
+def main():
+    args = parse_args()
+    pages = load_fixtures(args.fixtures)
+    if not pages:
+        print(f"No *.html fixtures found in {args.fixtures}")
+        return 1
+
+    if args.measure_rss:
+        # Child side of measure_rss(): the fixtures and both parsers are already loaded
+        baseline = max_rss_kib()
+        run_extractor(EXTRACTORS[args.measure_rss], pages)
+        print(json.dumps({"baseline_kib": baseline, "peak_kib": max_rss_kib()}))
+        return 0
+
+    mismatches = check_identical(pages)
+    for extractor_name, page_name, expected, actual in mismatches:
+        print(f"MISMATCH {extractor_name} on {page_name}:\n  expected {expected}\n  got      {actual}")
+
+    print(f"{len(pages)} fixtures, {args.iterations} iterations")
+    # Peak RSS of a fresh process after one pass, and how much of it the pass added
+    # on top of the interpreter and both parser libraries being loaded
+    print(f"{'extractor':<10} {'pages/s':>10} {'peak RSS':>14} {'added by pass':>14}")
+    for extractor_name in EXTRACTORS:
+        pages_per_second, peak, growth = measure(extractor_name, pages, args.iterations, args.fixtures)
+        print(f"{extractor_name:<10} {pages_per_second:>10.1f} {peak / 1024:>10.1f} MiB {growth / 1024:>10.1f} MiB")
+
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,133 @@
+import argparse
+import functools
+import http.server
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Allow running as `python benchmarks/load_test.py` from chatbot-python/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Drive the Flask app against a local stub HTML server and an in-memory vector store"
+    )
+    parser.add_argument("--endpoint", choices=("scrape", "batch", "query"), default="scrape",
+                        help="Endpoint to load: /scrape, /scrape/batch or /query")
+    parser.add_argument("--requests", type=int, default=200, help="Total number of requests to send")
+    parser.add_argument("--concurrency", type=int, default=8, help="Number of concurrent clients")
+    parser.add_argument("--batch-size", type=int, default=10, help="URLs per /scrape/batch request")
+    parser.add_argument("--stub-latency-ms", type=float, default=0.0,
+                        help="Artificial delay added by the stub HTML server to every page")
+    parser.add_argument("--fixtures", default=FIXTURES_DIR, help="Directory of professor pages served by the stub")
+    return parser.parse_args()
+
+
+def start_stub_server(directory, latency_ms):
+    # Serves saved professor pages over HTTP, optionally with a fixed delay per page
+    class StubHandler(http.server.SimpleHTTPRequestHandler):
+        def do_GET(self):
+            if latency_ms:
+                time.sleep(latency_ms / 1000.0)
+            super().do_GET()
+
+        def log_message(self, format, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(StubHandler, directory=directory))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    position = (len(sorted_values) - 1) * q
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+def main():
+    args = parse_args()
+    # Empty fixtures only exercise the extractors' error path, so leave them out of the load
+    pages = sorted(
+        name for name in os.listdir(args.fixtures)
+        if name.endswith(".html") and os.path.getsize(os.path.join(args.fixtures, name))
+    )
+    if not pages:
+        print(f"No *.html fixtures found in {args.fixtures}")
+        return 1
+
+    server = start_stub_server(args.fixtures, args.stub_latency_ms)
+    base_url = f"http://127.0.0.1:{server.server_port}/"
+
+    # Keep every store the service opens off the real index and out of the working tree
+    workdir = tempfile.mkdtemp(prefix="rmp-load-test-")
+    os.environ.update({
+        "VECTOR_STORE": "memory",
+        "EMBEDDING_CACHE_PATH": os.path.join(workdir, "embedding_cache.db"),
+        "REVIEW_STORE_PATH": os.path.join(workdir, "review_store.db"),
+        "JOB_QUEUE_PATH": os.path.join(workdir, "jobs.db"),
+        "SCRAPE_REQUESTS_PER_SECOND": "0",
+        "SCRAPE_PER_HOST_CONCURRENCY": str(max(args.concurrency * args.batch_size, 1)),
+    })
+    import scraper
+    from metrics import stage_summary
+    client = scraper.app.test_client()
+
+    def build_request(i):
+        if args.endpoint == "scrape":
+            return "/scrape", {"url": base_url + pages[i % len(pages)]}
+        if args.endpoint == "batch":
+            urls = [base_url + pages[(i + j) % len(pages)] for j in range(args.batch_size)]
+            return "/scrape/batch", {"urls": urls}
+        return "/query", {"query": f"professor who is a tough grader {i % 50}", "top_k": 10}
+
+    if args.endpoint == "query":
+        # Give queries something to search
+        client.post("/scrape/batch", json={"urls": [base_url + page for page in pages]})
+
+    def send(i):
+        path, payload = build_request(i)
+        start = time.perf_counter()
+        response = client.post(path, json=payload)
+        return time.perf_counter() - start, response.status_code
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(send, range(args.requests)))
+    elapsed = time.perf_counter() - start
+    server.shutdown()
+
+    latencies = sorted(latency for latency, _ in results)
+    errors = sum(1 for _, status in results if status >= 400)
+    report = {
+        "endpoint": args.endpoint,
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "errors": errors,
+        "elapsed_seconds": round(elapsed, 3),
+        "requests_per_second": round(args.requests / elapsed, 2),
+        "latency_ms": {
+            "p50": round(percentile(latencies, 0.50) * 1000, 2),
+            "p95": round(percentile(latencies, 0.95) * 1000, 2),
+            "p99": round(percentile(latencies, 0.99) * 1000, 2),
+            "max": round(latencies[-1] * 1000, 2),
+        },
+        "stages": stage_summary(),
+        "embedding_service": scraper.embedding_service.stats(),
+    }
+    print(json.dumps(report, indent=2))
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,142 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import numpy as np
+from metrics import stage
+
+
+def text_hash(model_name, text):
+    return hashlib.sha256(f"{model_name}\0{text}".encode("utf-8")).hexdigest()
+
+
+def vector_fingerprint(vector, source_key):
+    # The values are fully determined by the model and text, so hashing the text's
+    # cache key together with the metadata identifies an unchanged vector
+    payload = json.dumps({"metadata": vector.get("metadata", {}), "source": source_key},
+                         sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    # Persistent on-disk cache of embeddings keyed by a hash of the model name and
+    # the text, with least-recently-used eviction once max_entries is exceeded.
+    # It also remembers what was last upserted for each vector ID in each target
+    # index (see vector_store.index_identity) so unchanged professors can skip the
+    # upsert entirely.
+
+    def __init__(self, path, model_name, max_entries=100000):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.model_name = model_name
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.skipped_upserts = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "key TEXT PRIMARY KEY, dtype TEXT NOT NULL, vector BLOB NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS upserted (target TEXT NOT NULL, namespace TEXT NOT NULL, id TEXT NOT NULL, "
+            "fingerprint TEXT NOT NULL, PRIMARY KEY (target, namespace, id))"
+        )
+        self._db.commit()
+
+    def key(self, text):
+        return text_hash(self.model_name, text)
+
+    def encode(self, texts, encode_fn):
+        # Returns embeddings for texts, calling encode_fn only for the cache misses
+        keys = [self.key(text) for text in texts]
+        embeddings = [None] * len(texts)
+        now = time.time()
+        with self._lock:
+            for i, key in enumerate(keys):
+                row = self._db.execute("SELECT dtype, vector FROM embeddings WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    embeddings[i] = np.frombuffer(row[1], dtype=row[0])
+            hit_keys = [(now, key) for key, embedding in zip(keys, embeddings) if embedding is not None]
+            self._db.executemany("UPDATE embeddings SET last_used = ? WHERE key = ?", hit_keys)
+            self._db.commit()
+
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        if missing:
+            # Encode each distinct missing text once
+            unique_texts = list(dict.fromkeys(texts[i] for i in missing))
+            with stage("encode", items=len(unique_texts)):
+                encoded = dict(zip(unique_texts, encode_fn(unique_texts)))
+            for i in missing:
+                embeddings[i] = np.asarray(encoded[texts[i]])
+            rows = []
+            for text in unique_texts:
+                embedding = np.asarray(encoded[text])
+                rows.append((self.key(text), embedding.dtype.name, embedding.tobytes(), now))
+            with self._lock:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO embeddings (key, dtype, vector, last_used) VALUES (?, ?, ?, ?)", rows
+                )
+                self._evict()
+                self._db.commit()
+
+        with self._lock:
+            self.hits += len(texts) - len(missing)
+            self.misses += len(missing)
+        return np.stack(embeddings) if embeddings else np.empty((0, 0), dtype=np.float32)
+
+    def _evict(self):
+        count = self._db.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        excess = count - self.max_entries
+        if excess > 0:
+            self._db.execute(
+                "DELETE FROM embeddings WHERE key IN (SELECT key FROM embeddings ORDER BY last_used LIMIT ?)",
+                (excess,),
+            )
+
+    def changed_vectors(self, vectors, texts, target, namespace="ns1", present_ids=None):
+        # Incremental mode: drop vectors whose text and metadata match the last upsert
+        # to this target. present_ids(ids) returns the IDs the index still holds, so
+        # vectors that were removed since (e.g. the index was recreated) are re-sent.
+        unchanged = set()
+        with self._lock:
+            for vector, text in zip(vectors, texts):
+                row = self._db.execute(
+                    "SELECT fingerprint FROM upserted WHERE target = ? AND namespace = ? AND id = ?",
+                    (target, namespace, vector["id"]),
+                ).fetchone()
+                if row is not None and row[0] == vector_fingerprint(vector, self.key(text)):
+                    unchanged.add(vector["id"])
+        if unchanged and present_ids is not None:
+            unchanged &= set(present_ids(sorted(unchanged)))
+        with self._lock:
+            self.skipped_upserts += len(unchanged)
+        return [(vector, text) for vector, text in zip(vectors, texts) if vector["id"] not in unchanged]
+
+    def mark_upserted(self, vectors, texts, target, namespace="ns1"):
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO upserted (target, namespace, id, fingerprint) VALUES (?, ?, ?, ?)",
+                [
+                    (target, namespace, vector["id"], vector_fingerprint(vector, self.key(text)))
+                    for vector, text in zip(vectors, texts)
+                ],
+            )
+            self._db.commit()
+
+    def forget_upserted(self, ids, target, namespace="ns1"):
+        with self._lock:
+            self._db.executemany(
+                "DELETE FROM upserted WHERE target = ? AND namespace = ? AND id = ?",
+                [(target, namespace, vector_id) for vector_id in ids],
+            )
+            self._db.commit()
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "skipped_upserts": self.skipped_upserts}
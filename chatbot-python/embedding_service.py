@@ -0,0 +1,106 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+import numpy as np
+
+
+def _resolve(future, result=None, exception=None):
+    try:
+        if exception is not None:
+            future.set_exception(exception)
+        else:
+            future.set_result(result)
+    except Exception:
+        # Already resolved elsewhere; nobody is waiting on this future any more
+        pass
+
+
+class EmbeddingService:
+    # Collects encode requests from any thread into micro-batches and runs them on
+    # a single worker, so concurrent handlers share one forward pass instead of
+    # each paying for a single-item encode. A batch is sent as soon as it reaches
+    # max_batch_size texts or the oldest request has waited max_wait_ms.
+
+    def __init__(self, model, max_batch_size=64, max_wait_ms=5):
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = queue.Queue()
+        self._stats_lock = threading.Lock()
+        self._batches = 0
+        self._texts = 0
+        self._max_batch_seen = 0
+        self._worker = threading.Thread(target=self._run, name="embedding-worker", daemon=True)
+        self._worker.start()
+
+    def submit(self, texts):
+        # Returns a Future resolving to an array of embeddings, one row per text
+        future = Future()
+        if not texts:
+            future.set_result(np.empty((0, 0), dtype=np.float32))
+            return future
+        self._queue.put((list(texts), future))
+        return future
+
+    def encode(self, texts):
+        # Blocking helper with the same shape as model.encode for a list of texts
+        return self.submit(texts).result()
+
+    def _take(self, timeout=None):
+        # Next request whose caller still wants the result; cancelled futures are dropped
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return None
+            try:
+                texts, future = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                return None
+            if future.set_running_or_notify_cancel():
+                return texts, future
+
+    def _next_batch(self):
+        pending = [self._take()]
+        size = len(pending[0][0])
+        deadline = time.monotonic() + self.max_wait
+        while size < self.max_batch_size:
+            item = self._take(timeout=deadline - time.monotonic())
+            if item is None:
+                break
+            pending.append(item)
+            size += len(item[0])
+        return pending
+
+    def _run(self):
+        # The worker must outlive any single batch: if it stops, every encode() blocks forever
+        while True:
+            pending = self._next_batch()
+            texts = [text for request_texts, _ in pending for text in request_texts]
+            try:
+                embeddings = self.model.encode(texts, batch_size=self.max_batch_size)
+            except Exception as e:
+                for _, future in pending:
+                    _resolve(future, exception=e)
+                continue
+
+            offset = 0
+            for request_texts, future in pending:
+                _resolve(future, result=embeddings[offset:offset + len(request_texts)])
+                offset += len(request_texts)
+
+            with self._stats_lock:
+                self._batches += 1
+                self._texts += len(texts)
+                self._max_batch_seen = max(self._max_batch_seen, len(texts))
+
+    def stats(self):
+        with self._stats_lock:
+            return {
+                "queue_depth": self._queue.qsize(),
+                "batches": self._batches,
+                "texts": self._texts,
+                "mean_batch_size": self._texts / self._batches if self._batches else 0.0,
+                "max_batch_size": self._max_batch_seen,
+            }
@@ -0,0 +1,183 @@
+from bs4 import BeautifulSoup
+
+try:
+    from lxml import etree, html as lxml_html
+except ImportError:  # lxml is optional; fall back to the BeautifulSoup extractor
+    lxml_html = None
+
+
+# Helper functions
+def get_text_or_na(soup_element):
+    return soup_element.get_text(strip=True) if soup_element else 'N/A'
+
+
+def safe_int(value):
+    try:
+        return int(value)
+    except (ValueError, TypeError):
+        return 'N/A'
+
+
+def safe_float(value):
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return 'N/A'
+
+
+def extract_professor(html_content):
+    # Parse the HTML content with BeautifulSoup
+    soup = BeautifulSoup(html_content, 'html.parser')
+
+    # Extract the professor's name
+    professor_name = get_text_or_na(soup.find('div', class_='NameTitle__Name-dowf0z-0'))
+
+    # Extract the department
+    department = get_text_or_na(soup.find('div', class_='NameTitle__Title-dowf0z-1').find('a'))
+
+    # Extract the school name
+    school_name = get_text_or_na(soup.find('div', class_='NameTitle__Title-dowf0z-1').find_all('a')[1])
+
+    # Extract the overall rating
+    overall_rating = safe_float(get_text_or_na(soup.find('div', class_='RatingValue__Numerator-qw8sqy-2')))
+
+    # Extract the number of ratings
+    num_ratings = safe_int(get_text_or_na(soup.find('div', class_='RatingValue__NumRatings-qw8sqy-0').find('a')).replace("ratings", "").strip())
+
+    # Extract the percentage of students who would take again
+    take_again_element = soup.find('div', string="Would take again").find_previous_sibling('div')
+    take_again = safe_int(get_text_or_na(take_again_element).replace('%', ''))
+
+    # Extract the level of difficulty
+    difficulty_element = soup.find('div', string="Level of Difficulty").find_previous_sibling('div')
+    difficulty = safe_float(get_text_or_na(difficulty_element))
+
+    # Extract the top tags and ensure uniqueness
+    tags_container = soup.find('div', class_='TeacherTags__TagsContainer-sc-16vmh1y-0 dbxJaW')
+    top_tags = [get_text_or_na(tag) for tag in tags_container.find_all('span', class_='Tag-bs9vf4-0 hHOVKF')] if tags_container else ['N/A']
+
+    # Extract the reviews
+    reviews = []
+    review_list = soup.find_all('div', class_='Rating__StyledRating-sc-1rhvpxz-1')
+
+    for review in review_list:
+        comment = get_text_or_na(review.find('div', class_='Comments__StyledComments-dzzyvm-0'))
+        reviews.append(comment)
+
+    return {
+        "name": professor_name,
+        "department": department,
+        "school": school_name,
+        "overall_quality": overall_rating,
+        "number_of_ratings": num_ratings,
+        "would_take_again_percentage": take_again,
+        "level_of_difficulty": difficulty,
+        "top_tags": top_tags,
+        "reviews": reviews
+    }
+
+
+# Fast path: the same selectors evaluated as XPath over an lxml tree, which is
+# built in C and avoids BeautifulSoup's per-node Python objects
+def _class_token(name):
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+def _class_exact(name):
+    return f"normalize-space(@class) = '{name}'"
+
+
+def _first(element, xpath):
+    if element is None:
+        raise AttributeError(f"Cannot search for {xpath!r} inside a missing element")
+    matches = element.xpath(xpath)
+    return matches[0] if matches else None
+
+
+def _lxml_text_or_na(element):
+    # Mirrors get_text(strip=True): every text node stripped and joined without a separator
+    if element is None:
+        return 'N/A'
+    return ''.join(text.strip() for text in element.xpath('.//text()'))
+
+
+def _soup_string(element):
+    # Mirrors BeautifulSoup's .string: the text of an element with a single child,
+    # following single-child chains down the tree
+    if element.text and len(element) == 0:
+        return element.text
+    if element.text or len(element) != 1 or element[0].tail:
+        return None
+    if not isinstance(element[0].tag, str):
+        return None
+    return _soup_string(element[0])
+
+
+def _feedback_value(tree, label):
+    # Same as soup.find('div', string=label).find_previous_sibling('div')
+    for candidate in tree.xpath('//div[string(.) = $label]', label=label):
+        if _soup_string(candidate) == label:
+            return next(candidate.itersiblings('div', preceding=True), None)
+    raise AttributeError(f"No div with text {label!r}")
+
+
+def extract_professor_fast(html_content):
+    if lxml_html is None:
+        return extract_professor(html_content)
+
+    try:
+        tree = lxml_html.document_fromstring(html_content)
+    except etree.ParserError as e:
+        # An empty page has no elements at all; fail the way the soup extractor
+        # does so callers only ever need to handle AttributeError/IndexError
+        raise AttributeError(str(e)) from e
+    except ValueError:
+        # lxml refuses str input that starts with an <?xml ... encoding=...?>
+        # declaration; such pages are rare, so let BeautifulSoup handle them
+        return extract_professor(html_content)
+
+    professor_name = _lxml_text_or_na(_first(tree, f"//div[{_class_token('NameTitle__Name-dowf0z-0')}]"))
+
+    title = _first(tree, f"//div[{_class_token('NameTitle__Title-dowf0z-1')}]")
+    if title is None:
+        raise AttributeError("Professor title block not found")
+    title_links = title.xpath('.//a')
+    department = _lxml_text_or_na(title_links[0] if title_links else None)
+    school_name = _lxml_text_or_na(title_links[1])
+
+    overall_rating = safe_float(_lxml_text_or_na(_first(tree, f"//div[{_class_token('RatingValue__Numerator-qw8sqy-2')}]")))
+
+    num_ratings_element = _first(_first(tree, f"//div[{_class_token('RatingValue__NumRatings-qw8sqy-0')}]"), './/a')
+    num_ratings = safe_int(_lxml_text_or_na(num_ratings_element).replace("ratings", "").strip())
+
+    take_again = safe_int(_lxml_text_or_na(_feedback_value(tree, "Would take again")).replace('%', ''))
+    difficulty = safe_float(_lxml_text_or_na(_feedback_value(tree, "Level of Difficulty")))
+
+    tags_container = _first(tree, f"//div[{_class_exact('TeacherTags__TagsContainer-sc-16vmh1y-0 dbxJaW')}]")
+    if tags_container is not None:
+        top_tags = [_lxml_text_or_na(tag) for tag in tags_container.xpath(f".//span[{_class_exact('Tag-bs9vf4-0 hHOVKF')}]")]
+    else:
+        top_tags = ['N/A']
+
+    reviews = [
+        _lxml_text_or_na(_first(review, f".//div[{_class_token('Comments__StyledComments-dzzyvm-0')}]"))
+        for review in tree.xpath(f"//div[{_class_token('Rating__StyledRating-sc-1rhvpxz-1')}]")
+    ]
+
+    return {
+        "name": professor_name,
+        "department": department,
+        "school": school_name,
+        "overall_quality": overall_rating,
+        "number_of_ratings": num_ratings,
+        "would_take_again_percentage": take_again,
+        "level_of_difficulty": difficulty,
+        "top_tags": top_tags,
+        "reviews": reviews
+    }
+
+
+EXTRACTORS = {
+    "soup": extract_professor,
+    "fast": extract_professor_fast,
+}
@@ -0,0 +1,89 @@
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from metrics import stage
+
+
+def is_http_url(url):
+    if not isinstance(url, str):
+        return False
+    parsed = urlparse(url)
+    return parsed.scheme in ("http", "https") and bool(parsed.netloc)
+
+
+class HostLimiter:
+    # Caps in-flight requests per host and spaces request starts by a minimum interval
+
+    def __init__(self, max_concurrency, requests_per_second):
+        self.max_concurrency = max_concurrency
+        self.min_interval = 1.0 / requests_per_second if requests_per_second else 0.0
+        self._lock = threading.Lock()
+        self._semaphores = defaultdict(lambda: threading.BoundedSemaphore(self.max_concurrency))
+        self._next_start = defaultdict(float)
+
+    def acquire(self, host):
+        with self._lock:
+            semaphore = self._semaphores[host]
+        semaphore.acquire()
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_start[host])
+            self._next_start[host] = start + self.min_interval
+        if start > now:
+            time.sleep(start - now)
+        return semaphore
+
+    def release(self, semaphore):
+        semaphore.release()
+
+
+class Fetcher:
+    # Fetches many URLs concurrently over one pooled requests.Session with
+    # timeouts, retries with exponential backoff and per-host rate limiting
+
+    def __init__(self, max_workers=16, per_host_concurrency=4, requests_per_second=5.0,
+                 timeout=(5, 20), retries=3, backoff_factor=0.5):
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.limiter = HostLimiter(per_host_concurrency, requests_per_second)
+
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=("GET",),
+            respect_retry_after_header=True,
+        )
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def fetch(self, url):
+        semaphore = self.limiter.acquire(urlparse(url).netloc)
+        try:
+            with stage("fetch"):
+                response = self.session.get(url, timeout=self.timeout)
+                response.raise_for_status()
+            return response.text
+        finally:
+            self.limiter.release(semaphore)
+
+    def fetch_many(self, urls):
+        # Returns (url, html, error) tuples in the same order as urls; one bad URL
+        # never fails the others
+        def fetch_one(url):
+            if not is_http_url(url):
+                return url, None, "Not an http(s) URL"
+            try:
+                return url, self.fetch(url), None
+            except Exception as e:
+                return url, None, str(e)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            return list(pool.map(fetch_one, urls))
@@ -0,0 +1,83 @@
+from professors import build_records, build_vector, chunk_id, professor_id
+from vector_store import batched, upsert_chunks
+
+
+class Indexer:
+    # Turns parsed professors into vectors and writes them to the index. Shared by
+    # the Flask service and setup_rag.py so both honour INDEX_MODE, the embedding
+    # cache and incremental mode the same way.
+
+    def __init__(self, index, embedding_cache, encode_fn, mode="professor", review_store=None,
+                 incremental=False, namespace="ns1", upsert_batch_size=100, on_change=None, target=None):
+        if mode == "chunked" and review_store is None:
+            raise ValueError("Chunked indexing needs a review store")
+        if incremental and target is None:
+            raise ValueError("Incremental indexing needs the target index identity")
+        self.index = index
+        self.embedding_cache = embedding_cache
+        self.encode_fn = encode_fn
+        self.mode = mode
+        self.review_store = review_store
+        self.incremental = incremental
+        self.namespace = namespace
+        self.upsert_batch_size = upsert_batch_size
+        # Identifies the index in the embedding cache's upsert records (vector_store.index_identity)
+        self.target = target
+        # Called after the index changes, e.g. to invalidate cached query results
+        self.on_change = on_change
+
+    def embed(self, professors):
+        # Encode every record for the batch of professors in one cache-backed call
+        records = [record for professor in professors for record in build_records(professor, self.mode)]
+        embeddings = self.embedding_cache.encode([record["text"] for record in records], self.encode_fn)
+        vectors = [build_vector(record, embedding) for record, embedding in zip(records, embeddings)]
+        return records, vectors
+
+    def upsert(self, professors, records, vectors):
+        texts = [record["text"] for record in records]
+        if self.incremental:
+            changed = self.embedding_cache.changed_vectors(
+                vectors, texts, self.target, namespace=self.namespace, present_ids=self._present_ids
+            )
+            vectors = [vector for vector, _ in changed]
+            texts = [text for _, text in changed]
+
+        upserted = upsert_chunks(self.index, vectors, self.upsert_batch_size, self.namespace) if vectors else 0
+        if self.incremental:
+            self.embedding_cache.mark_upserted(vectors, texts, self.target, namespace=self.namespace)
+
+        if self.mode == "chunked":
+            self._store_reviews(professors, records)
+        if self.on_change is not None and (upserted or self.mode == "chunked"):
+            self.on_change()
+        return upserted
+
+    def _present_ids(self, ids):
+        # IDs the index actually holds, fetched in upsert-sized requests
+        present = set()
+        for chunk in batched(ids, self.upsert_batch_size):
+            present.update(self.index.fetch(ids=chunk, namespace=self.namespace)["vectors"])
+        return present
+
+    def index_professors(self, professors):
+        records, vectors = self.embed(professors)
+        return self.upsert(professors, records, vectors)
+
+    def _store_reviews(self, professors, records):
+        chunk_counts = {}
+        for record in records:
+            if record["metadata"]["type"] == "review_chunk":
+                prof_id = record["metadata"]["professor_id"]
+                chunk_counts[prof_id] = chunk_counts.get(prof_id, 0) + 1
+
+        stale_ids = []
+        for professor in professors:
+            prof_id = professor_id(professor)
+            chunk_count = chunk_counts.get(prof_id, 0)
+            previous_count = self.review_store.put(prof_id, professor, chunk_count)
+            stale_ids.extend(chunk_id(prof_id, position) for position in range(chunk_count, previous_count))
+
+        # Professors with fewer review chunks than last time leave old chunk vectors behind
+        if stale_ids:
+            self.index.delete(ids=stale_ids, namespace=self.namespace)
+            self.embedding_cache.forget_upserted(stale_ids, self.target, namespace=self.namespace)
@@ -0,0 +1,209 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+import requests
+
+# Job lifecycle: queued -> fetching -> encoding -> done | error
+PENDING_STATUSES = ("queued", "fetching", "encoding")
+PROGRESS = {"queued": 0.0, "fetching": 0.25, "encoding": 0.75, "done": 1.0, "error": 1.0}
+# In-flight jobs not updated for this long are assumed to belong to a process that stopped
+STALE_AFTER_SECONDS = 600
+
+
+class JobQueue:
+    # SQLite-backed scrape job queue, so pending jobs survive a restart. A URL
+    # that is already queued or in progress is not queued a second time. Several
+    # processes may share one database: claims are atomic, and only jobs that have
+    # been in flight for stale_after seconds are taken back from their owner.
+
+    def __init__(self, path, stale_after=STALE_AFTER_SECONDS):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.stale_after = stale_after
+        self._lock = threading.Lock()
+        self._has_work = threading.Event()
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, url TEXT NOT NULL, status TEXT NOT NULL, result TEXT, error TEXT, "
+            "created_at REAL NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at)")
+        self._db.execute(
+            "CREATE UNIQUE INDEX IF NOT EXISTS jobs_pending_url ON jobs (url) "
+            "WHERE status IN ('queued', 'fetching', 'encoding')"
+        )
+        self._db.commit()
+        self.requeue_stale()
+        if self.pending_count():
+            self._has_work.set()
+
+    def requeue_stale(self):
+        # Jobs left in flight by a process that stopped start over; returns how many
+        now = time.time()
+        with self._lock:
+            cursor = self._db.execute(
+                "UPDATE jobs SET status = 'queued', updated_at = ? "
+                "WHERE status IN ('fetching', 'encoding') AND updated_at <= ?",
+                (now, now - self.stale_after),
+            )
+            self._db.commit()
+        if cursor.rowcount:
+            self._has_work.set()
+        return cursor.rowcount
+
+    def enqueue(self, url):
+        # Returns (job ID, whether the URL was already pending)
+        with self._lock:
+            existing = self._db.execute(
+                "SELECT id FROM jobs WHERE url = ? AND status IN ('queued', 'fetching', 'encoding')", (url,)
+            ).fetchone()
+            if existing is not None:
+                return existing[0], True
+            job_id = uuid.uuid4().hex
+            now = time.time()
+            try:
+                self._db.execute(
+                    "INSERT INTO jobs (id, url, status, created_at, updated_at) VALUES (?, ?, 'queued', ?, ?)",
+                    (job_id, url, now, now),
+                )
+            except sqlite3.IntegrityError:
+                # Another process queued the same URL since the check above
+                self._db.rollback()
+                existing = self._db.execute(
+                    "SELECT id FROM jobs WHERE url = ? AND status IN ('queued', 'fetching', 'encoding')", (url,)
+                ).fetchone()
+                return existing[0], True
+            self._db.commit()
+        self._has_work.set()
+        return job_id, False
+
+    def claim(self, timeout=1.0):
+        # Marks the oldest queued job as fetching and returns (job ID, URL), or None
+        if not self._has_work.wait(timeout) and not self.requeue_stale():
+            return None
+        with self._lock:
+            # One statement, so a job is never claimed by two processes sharing the database
+            row = self._db.execute(
+                "UPDATE jobs SET status = 'fetching', updated_at = ? "
+                "WHERE id = (SELECT id FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1) "
+                "AND status = 'queued' RETURNING id, url",
+                (time.time(),),
+            ).fetchone()
+            self._db.commit()
+            if row is None:
+                self._has_work.clear()
+                return None
+        return row
+
+    def update(self, job_id, status, result=None, error=None):
+        with self._lock:
+            self._db.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, updated_at = ? WHERE id = ?",
+                (status, json.dumps(result) if result is not None else None, error, time.time(), job_id),
+            )
+            self._db.commit()
+
+    def get(self, job_id):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT id, url, status, result, error, created_at, updated_at FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        job_id, url, status, result, error, created_at, updated_at = row
+        return {
+            "job_id": job_id,
+            "url": url,
+            "status": status,
+            "progress": PROGRESS[status],
+            "result": json.loads(result) if result is not None else None,
+            "error": error,
+            "created_at": created_at,
+            "updated_at": updated_at,
+        }
+
+    def pending_count(self):
+        with self._lock:
+            return self._db.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status IN ('queued', 'fetching', 'encoding')"
+            ).fetchone()[0]
+
+    def stats(self):
+        with self._lock:
+            counts = dict(self._db.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status"))
+        return {status: counts.get(status, 0) for status in PROGRESS}
+
+
+class JobRunner:
+    # Processes queued jobs with separately sized pools: fetching (I/O bound) runs
+    # on fetch_workers threads and parsing, encoding and upserting (CPU bound) on
+    # encode_workers threads. At most fetch_workers + encode_workers jobs are
+    # claimed at a time, so the rest stay queued in the database.
+
+    def __init__(self, job_queue, fetcher, parse_professor, indexer, fetch_workers=8, encode_workers=2):
+        self.job_queue = job_queue
+        self.fetcher = fetcher
+        self.parse_professor = parse_professor
+        self.indexer = indexer
+        self._fetch_pool = ThreadPoolExecutor(max_workers=fetch_workers, thread_name_prefix="job-fetch")
+        self._encode_pool = ThreadPoolExecutor(max_workers=encode_workers, thread_name_prefix="job-encode")
+        self._slots = threading.BoundedSemaphore(fetch_workers + encode_workers)
+        self._dispatcher = threading.Thread(target=self._dispatch, name="job-dispatcher", daemon=True)
+
+    def start(self):
+        self._dispatcher.start()
+
+    def _dispatch(self):
+        while True:
+            self._slots.acquire()
+            job = None
+            while job is None:
+                job = self.job_queue.claim()
+            self._fetch_pool.submit(self._fetch, *job)
+
+    # Every path out of _fetch and _encode must reach _finish exactly once: an
+    # exception left inside an executor future would strand the job in its
+    # current status and never release its slot.
+
+    def _fetch(self, job_id, url):
+        try:
+            html_content = self.fetcher.fetch(url)
+        except requests.RequestException as e:
+            self._finish(job_id, "error", error=f"Failed to fetch URL: {e}")
+            return
+        except Exception as e:
+            self._finish(job_id, "error", error=str(e))
+            return
+        try:
+            self.job_queue.update(job_id, "encoding")
+            self._encode_pool.submit(self._encode, job_id, html_content)
+        except Exception as e:
+            self._finish(job_id, "error", error=str(e))
+
+    def _encode(self, job_id, html_content):
+        try:
+            professor = self.parse_professor(html_content)
+        except (AttributeError, IndexError) as e:
+            self._finish(job_id, "error", error=f"Could not parse professor page: {e}")
+            return
+        except Exception as e:
+            self._finish(job_id, "error", error=str(e))
+            return
+        try:
+            upserted = self.indexer.index_professors([professor])
+        except Exception as e:
+            self._finish(job_id, "error", error=str(e))
+            return
+        self._finish(job_id, "done", result={"professor": professor, "upserted": upserted})
+
+    def _finish(self, job_id, status, result=None, error=None):
+        try:
+            self.job_queue.update(job_id, status, result=result, error=error)
+        finally:
+            self._slots.release()
@@ -0,0 +1,183 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+# Latency buckets in seconds, from sub-millisecond cache hits to slow page fetches
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _label_text(label_names, label_values):
+    if not label_names:
+        return ""
+    pairs = ",".join(f'{name}="{value}"' for name, value in zip(label_names, label_values))
+    return "{" + pairs + "}"
+
+
+class Counter:
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels[name]) for name in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def values(self):
+        with self._lock:
+            return dict(self._values)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for key, value in sorted(self.values().items()):
+            lines.append(f"{self.name}{_label_text(self.labels, key)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels[name]) for name in self.labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {"counts": [0] * (len(self.buckets) + 1), "sum": 0.0, "count": 0, "max": 0.0}
+            series["counts"][bisect.bisect_left(self.buckets, value)] += 1
+            series["sum"] += value
+            series["count"] += 1
+            series["max"] = max(series["max"], value)
+
+    def series(self):
+        with self._lock:
+            return {key: {**series, "counts": list(series["counts"])} for key, series in self._series.items()}
+
+    def quantile(self, series, q):
+        # Estimate a quantile by linear interpolation inside the bucket that contains it
+        target = q * series["count"]
+        cumulative = 0
+        lower = 0.0
+        for upper, count in zip(self.buckets + (series["max"],), series["counts"]):
+            if count and cumulative + count >= target:
+                return min(lower + (upper - lower) * (target - cumulative) / count, series["max"])
+            cumulative += count
+            lower = upper
+        return series["max"]
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, series in sorted(self.series().items()):
+            cumulative = 0
+            for upper, count in zip(self.buckets + ("+Inf",), series["counts"]):
+                cumulative += count
+                labels = _label_text(self.labels + ("le",), key + (str(upper),))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_label_text(self.labels, key)} {series['sum']}")
+            lines.append(f"{self.name}_count{_label_text(self.labels, key)} {series['count']}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+        self._callbacks = []
+
+    def counter(self, name, help, labels=()):
+        metric = Counter(name, help, labels)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        metric = Histogram(name, help, labels, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def gauge(self, name, help, callback):
+        # callback() returns the current value, read at scrape time
+        self._callbacks.append((name, help, callback, "gauge"))
+
+    def counter_callback(self, name, help, callback):
+        # Like gauge(), for totals another component already keeps that only ever increase
+        self._callbacks.append((name, help, callback, "counter"))
+
+    def render(self):
+        # Prometheus text exposition format
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for name, help, callback, kind in self._callbacks:
+            lines.extend([f"# HELP {name} {help}", f"# TYPE {name} {kind}", f"{name} {callback()}"])
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+STAGE_LATENCY = REGISTRY.histogram(
+    "rmp_stage_latency_seconds", "Latency of each pipeline stage (fetch, parse, encode, upsert, ...)", labels=("stage",)
+)
+STAGE_ITEMS = REGISTRY.counter(
+    "rmp_stage_items_total", "Items processed by each pipeline stage (pages, texts, vectors)", labels=("stage",)
+)
+STAGE_ERRORS = REGISTRY.counter("rmp_stage_errors_total", "Errors raised by each pipeline stage", labels=("stage",))
+HTTP_LATENCY = REGISTRY.histogram(
+    "rmp_http_request_latency_seconds", "Latency of HTTP requests by endpoint", labels=("endpoint",)
+)
+HTTP_REQUESTS = REGISTRY.counter(
+    "rmp_http_requests_total", "HTTP requests by endpoint and status code", labels=("endpoint", "status")
+)
+
+
+@contextmanager
+def stage(name, items=1):
+    # Times a block as one run of a pipeline stage; errors are counted and re-raised
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        STAGE_ERRORS.inc(stage=name)
+        raise
+    else:
+        STAGE_ITEMS.inc(items, stage=name)
+    finally:
+        STAGE_LATENCY.observe(time.perf_counter() - start, stage=name)
+
+
+def timed(name):
+    # Decorator form of stage() for functions that process one item per call
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def stage_summary():
+    # Structured per-stage summary, e.g. for printing at the end of ingestion
+    items = STAGE_ITEMS.values()
+    errors = STAGE_ERRORS.values()
+    summary = {}
+    for (stage_name,), series in sorted(STAGE_LATENCY.series().items()):
+        summary[stage_name] = {
+            "calls": series["count"],
+            "items": items.get((stage_name,), 0),
+            "errors": errors.get((stage_name,), 0),
+            "total_seconds": round(series["sum"], 4),
+            "mean_ms": round(series["sum"] / series["count"] * 1000, 3) if series["count"] else 0.0,
+            "p50_ms": round(STAGE_LATENCY.quantile(series, 0.5) * 1000, 3),
+            "p95_ms": round(STAGE_LATENCY.quantile(series, 0.95) * 1000, 3),
+            "max_ms": round(series["max"] * 1000, 3),
+        }
+    return summary
@@ -0,0 +1,105 @@
+# Shared by the Flask service and setup_rag.py so both hit the same embedding cache entries
+MODEL_NAME = 'sentence-transformers/all-MiniLM-L6-v2'  # This model outputs 384-dimensional embeddings
+
+# all-MiniLM-L6-v2 truncates at 256 word pieces, so review chunks stay well under that
+CHUNK_MAX_WORDS = 150
+
+
+def build_combined_info(professor):
+    # Combine all relevant information about the professor into a single string
+    combined_info = build_summary_info(professor)
+    combined_info += f" Reviews: {' | '.join(professor['reviews'])}"
+    return combined_info
+
+
+def build_summary_info(professor):
+    # Everything except the reviews, used for the compact summary vector in chunked mode
+    summary_info = f"{professor['name']} teaches in the {professor['department']} department at {professor['school']}. "
+    summary_info += f"Overall quality: {professor['overall_quality']}, Number of ratings: {professor['number_of_ratings']}, "
+    summary_info += f"Would take again percentage: {professor['would_take_again_percentage']}%, Level of difficulty: {professor['level_of_difficulty']}. "
+    summary_info += f"Top tags: {', '.join(professor['top_tags'])}."
+    return summary_info
+
+
+def professor_id(professor):
+    return f"{professor['name']}_info".replace(" ", "_")
+
+
+def chunk_id(prof_id, position):
+    return f"{prof_id}#chunk{position}"
+
+
+def professor_metadata(professor):
+    return {
+        "type": "professor_info",
+        "professor_name": professor["name"],
+        "department": professor["department"],
+        "school": professor["school"],
+        "overall_quality": professor["overall_quality"],
+        "number_of_ratings": professor["number_of_ratings"],
+        "would_take_again_percentage": professor["would_take_again_percentage"],
+        "level_of_difficulty": professor["level_of_difficulty"],
+        "top_tags": professor["top_tags"],
+        "reviews": professor["reviews"]
+    }
+
+
+def chunk_reviews(reviews, max_words=CHUNK_MAX_WORDS):
+    # Group consecutive reviews into chunks of at most max_words words; a single
+    # longer review gets a chunk of its own. Yields (start, end) review ranges.
+    start = 0
+    words = 0
+    for position, review in enumerate(reviews):
+        review_words = len(review.split())
+        if position > start and words + review_words > max_words:
+            yield start, position
+            start = position
+            words = 0
+        words += review_words
+    if start < len(reviews):
+        yield start, len(reviews)
+
+
+def build_records(professor, mode="professor"):
+    # Returns the records to embed for a professor as dicts of id, text and metadata.
+    # "professor" mode stores one vector per professor with every review in its
+    # metadata; "chunked" mode stores a summary vector without reviews plus one
+    # vector per review chunk referencing the professor ID.
+    prof_id = professor_id(professor)
+    if mode == "professor":
+        return [{"id": prof_id, "text": build_combined_info(professor), "metadata": professor_metadata(professor)}]
+    if mode != "chunked":
+        raise ValueError(f"Unknown INDEX_MODE: {mode}")
+
+    summary_metadata = professor_metadata(professor)
+    del summary_metadata["reviews"]
+    summary_metadata["review_count"] = len(professor["reviews"])
+    records = [{"id": prof_id, "text": build_summary_info(professor), "metadata": summary_metadata}]
+
+    # Chunks repeat only the small filterable fields so filtered queries still match them
+    chunk_metadata = {
+        "type": "review_chunk",
+        "professor_id": prof_id,
+        "professor_name": professor["name"],
+        "department": professor["department"],
+        "school": professor["school"],
+        "overall_quality": professor["overall_quality"],
+        "number_of_ratings": professor["number_of_ratings"],
+        "would_take_again_percentage": professor["would_take_again_percentage"],
+        "level_of_difficulty": professor["level_of_difficulty"],
+    }
+    for position, (start, end) in enumerate(chunk_reviews(professor["reviews"])):
+        records.append({
+            "id": chunk_id(prof_id, position),
+            "text": f"Reviews of {professor['name']}: {' | '.join(professor['reviews'][start:end])}",
+            "metadata": {**chunk_metadata, "review_start": start, "review_end": end},
+        })
+    return records
+
+
+def build_vector(record, embedding):
+    return {
+        "values": embedding.tolist(),
+        "id": record["id"],
+        "metadata": record["metadata"],
+    }
@@ -0,0 +1,81 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+
+def normalize_query(text):
+    # Trimmed and lower-cased like the chat route (app/api/chat/route.ts), and also
+    # single-spaced so queries that differ only in whitespace share cache entries
+    return " ".join(text.lower().split())
+
+
+class LRUCache:
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.RLock()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+
+class TTLCache(LRUCache):
+    # LRU cache whose entries also expire ttl seconds after they were stored.
+    # clear() bumps a generation number so results computed before an
+    # invalidation cannot be stored after it.
+
+    def __init__(self, max_entries=1024, ttl=300):
+        super().__init__(max_entries)
+        self.ttl = ttl
+        self.generation = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                self._entries.pop(key, None)
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, key, value, generation=None):
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            super().put(key, (time.monotonic() + self.ttl, value))
+
+    def clear(self):
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+
+
+def result_key(vector, filter, top_k):
+    # Results depend only on the query vector, the filter and top_k
+    digest = hashlib.sha256(vector.tobytes())
+    digest.update(json.dumps(filter, sort_keys=True).encode("utf-8"))
+    digest.update(str(top_k).encode("utf-8"))
+    return digest.hexdigest()
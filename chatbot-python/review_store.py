@@ -0,0 +1,125 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from professors import professor_metadata
+
+
+class ReviewStore:
+    # Side store for chunked indexing: each unique review text is stored once,
+    # keyed by its hash, and professors keep an ordered list of review hashes
+    # plus their profile, so vector metadata never has to carry review text.
+
+    def __init__(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("CREATE TABLE IF NOT EXISTS review_texts (hash TEXT PRIMARY KEY, text TEXT NOT NULL)")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS professors ("
+            "id TEXT PRIMARY KEY, profile TEXT NOT NULL, review_hashes TEXT NOT NULL, chunk_count INTEGER NOT NULL)"
+        )
+        self._db.commit()
+
+    def put(self, prof_id, professor, chunk_count):
+        # Returns the chunk count previously stored for the professor so callers
+        # can delete chunk vectors that no longer exist
+        hashes = [hashlib.sha256(review.encode("utf-8")).hexdigest() for review in professor["reviews"]]
+        profile = {key: value for key, value in professor.items() if key != "reviews"}
+        with self._lock:
+            previous = self._db.execute("SELECT chunk_count FROM professors WHERE id = ?", (prof_id,)).fetchone()
+            self._db.executemany(
+                "INSERT OR IGNORE INTO review_texts (hash, text) VALUES (?, ?)",
+                zip(hashes, professor["reviews"]),
+            )
+            self._db.execute(
+                "INSERT OR REPLACE INTO professors (id, profile, review_hashes, chunk_count) VALUES (?, ?, ?, ?)",
+                (prof_id, json.dumps(profile), json.dumps(hashes), chunk_count),
+            )
+            self._db.commit()
+        return previous[0] if previous else 0
+
+    def get_many(self, prof_ids):
+        # Returns {professor ID: professor dict with reviews} for the IDs that are stored
+        if not prof_ids:
+            return {}
+        with self._lock:
+            placeholders = ", ".join("?" for _ in prof_ids)
+            rows = self._db.execute(
+                f"SELECT id, profile, review_hashes FROM professors WHERE id IN ({placeholders})", list(prof_ids)
+            ).fetchall()
+            hashes = {review_hash for _, _, review_hashes in rows for review_hash in json.loads(review_hashes)}
+            texts = {}
+            hash_list = list(hashes)
+            # Stay under SQLite's bound-parameter limit
+            for start in range(0, len(hash_list), 500):
+                batch = hash_list[start:start + 500]
+                placeholders = ", ".join("?" for _ in batch)
+                texts.update(self._db.execute(
+                    f"SELECT hash, text FROM review_texts WHERE hash IN ({placeholders})", batch
+                ))
+
+        professors = {}
+        for prof_id, profile, review_hashes in rows:
+            professor = json.loads(profile)
+            professor["reviews"] = [texts[review_hash] for review_hash in json.loads(review_hashes)]
+            professors[prof_id] = professor
+        return professors
+
+    def stats(self):
+        with self._lock:
+            professors = self._db.execute("SELECT COUNT(*) FROM professors").fetchone()[0]
+            unique_reviews, review_bytes = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(text)), 0) FROM review_texts"
+            ).fetchone()
+        return {"professors": professors, "unique_reviews": unique_reviews, "review_bytes": review_bytes}
+
+
+def aggregate_matches(matches, review_store=None, top_k=10):
+    # Fold summary and review-chunk hits into one result per professor, scored by
+    # the best matching vector, with the matched review ranges attached
+    professors = {}
+    for match in matches:
+        metadata = match["metadata"] or {}
+        prof_id = metadata.get("professor_id", match["id"])
+        entry = professors.get(prof_id)
+        if entry is None:
+            entry = professors[prof_id] = {
+                "id": prof_id,
+                "score": match["score"],
+                "matched_chunks": 0,
+                "matched_review_ranges": [],
+                "metadata": metadata,
+            }
+        entry["score"] = max(entry["score"], match["score"])
+        if metadata.get("type") == "review_chunk":
+            entry["matched_chunks"] += 1
+            entry["matched_review_ranges"].append([metadata["review_start"], metadata["review_end"]])
+        else:
+            entry["metadata"] = metadata
+
+    ranked = sorted(professors.values(), key=lambda entry: entry["score"], reverse=True)[:top_k]
+
+    # Restore full profiles and review text from the side store
+    stored = review_store.get_many([entry["id"] for entry in ranked]) if review_store else {}
+    for entry in ranked:
+        professor = stored.get(entry["id"])
+        if professor is not None:
+            entry["metadata"] = professor_metadata(professor)
+    return ranked
+
+
+def query_professors(index, vector, review_store=None, top_k=10, filter=None, namespace="ns1", oversample=4):
+    # Chunk hits for the same professor crowd each other out, so fetch extra
+    # vectors before aggregating back down to top_k professors
+    results = index.query(
+        vector=vector,
+        top_k=top_k * oversample if review_store else top_k,
+        namespace=namespace,
+        filter=filter,
+        include_metadata=True,
+    )
+    return aggregate_matches(results["matches"], review_store, top_k=top_k)
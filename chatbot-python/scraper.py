@@ -1,25 +1,121 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify
 import requests
-from bs4 import BeautifulSoup
 import json
 from dotenv import load_dotenv
 import os
-from pinecone import Pinecone
+import time
 from sentence_transformers import SentenceTransformer
+from embedding_cache import EmbeddingCache
+from embedding_service import EmbeddingService
+from extraction import EXTRACTORS
+from fetcher import Fetcher, is_http_url
+from indexing import Indexer
+from jobs import JobQueue, JobRunner
+from metrics import REGISTRY, HTTP_LATENCY, HTTP_REQUESTS, stage, timed
+from professors import MODEL_NAME
+from query_cache import LRUCache, TTLCache, normalize_query, result_key
+from review_store import ReviewStore, query_professors
+from vector_store import index_identity, open_index, validate_filter
 
 # Load environment variables
 load_dotenv()
 
-# Initialize Pinecone
-pc = Pinecone(api_key=os.getenv("PINECONE_API_KEY"))
-index = pc.Index("rag4")
+# Initialize the vector index (Pinecone or the local store, see VECTOR_STORE)
+index = open_index("rag4")
 
 # Initialize SentenceTransformer model
-model = SentenceTransformer('sentence-transformers/all-MiniLM-L6-v2')
+model = SentenceTransformer(MODEL_NAME)
+
+# Every handler encodes through one micro-batching worker instead of calling model.encode inline
+embedding_service = EmbeddingService(
+    model,
+    max_batch_size=int(os.getenv("EMBEDDING_MAX_BATCH_SIZE", 64)),
+    max_wait_ms=float(os.getenv("EMBEDDING_MAX_WAIT_MS", 5)),
+)
+
+# Persistent embedding cache; with INCREMENTAL_INDEXING unchanged professors skip the upsert
+embedding_cache = EmbeddingCache(
+    os.getenv("EMBEDDING_CACHE_PATH", "embedding_cache.db"),
+    MODEL_NAME,
+    max_entries=int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", 100000)),
+)
+
+# INDEX_MODE=chunked stores a summary vector plus per-review chunk vectors, with
+# review text kept once in the review store instead of in vector metadata
+INDEX_MODE = os.getenv("INDEX_MODE", "professor")
+review_store = ReviewStore(os.getenv("REVIEW_STORE_PATH", "review_store.db")) if INDEX_MODE == "chunked" else None
+
+# Query-side caches: normalised query text -> embedding, and (vector, filter, top_k) -> results.
+# Results are dropped whenever the indexer changes the index.
+query_embedding_cache = LRUCache(max_entries=int(os.getenv("QUERY_EMBEDDING_CACHE_SIZE", 4096)))
+query_result_cache = TTLCache(
+    max_entries=int(os.getenv("QUERY_RESULT_CACHE_SIZE", 1024)),
+    ttl=float(os.getenv("QUERY_RESULT_TTL_SECONDS", 300)),
+)
+
+indexer = Indexer(
+    index,
+    embedding_cache,
+    embedding_service.encode,
+    mode=INDEX_MODE,
+    review_store=review_store,
+    incremental=os.getenv("INCREMENTAL_INDEXING", "0") == "1",
+    namespace="ns1",
+    upsert_batch_size=int(os.getenv("UPSERT_BATCH_SIZE", 100)),
+    on_change=query_result_cache.clear,
+    target=index_identity("rag4"),
+)
+
+# Shared pooled HTTP client for page fetches
+fetcher = Fetcher(
+    max_workers=int(os.getenv("SCRAPE_MAX_WORKERS", 16)),
+    per_host_concurrency=int(os.getenv("SCRAPE_PER_HOST_CONCURRENCY", 4)),
+    requests_per_second=float(os.getenv("SCRAPE_REQUESTS_PER_SECOND", 5)),
+)
+
+MAX_BATCH_URLS = int(os.getenv("SCRAPE_MAX_BATCH_URLS", 500))
+
+# "fast" parses with lxml, "soup" is the original BeautifulSoup extractor
+parse_professor = timed("parse")(EXTRACTORS[os.getenv("HTML_EXTRACTOR", "fast")])
+
+# Background scrape jobs, persisted in SQLite so pending jobs survive a restart
+job_queue = JobQueue(os.getenv("JOB_QUEUE_PATH", "jobs.db"))
+job_runner = JobRunner(
+    job_queue,
+    fetcher,
+    parse_professor,
+    indexer,
+    fetch_workers=int(os.getenv("JOB_FETCH_WORKERS", 8)),
+    encode_workers=int(os.getenv("JOB_ENCODE_WORKERS", 2)),
+)
+job_runner.start()
+
+# Live values exposed next to the stage histograms on /metrics
+REGISTRY.gauge("rmp_embedding_queue_depth", "Encode requests waiting for the embedding worker",
+               lambda: embedding_service.stats()["queue_depth"])
+REGISTRY.counter_callback("rmp_embedding_cache_hits_total", "Embedding cache hits since start",
+                          lambda: embedding_cache.stats()["hits"])
+REGISTRY.counter_callback("rmp_embedding_cache_misses_total", "Embedding cache misses since start",
+                          lambda: embedding_cache.stats()["misses"])
+REGISTRY.gauge("rmp_scrape_jobs_pending", "Scrape jobs queued or in progress", job_queue.pending_count)
 
 # Initialize Flask app
 app = Flask(__name__)
 
+
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+
+
+@app.after_request
+def record_request_metrics(response):
+    endpoint = request.url_rule.rule if request.url_rule else "unmatched"
+    HTTP_LATENCY.observe(time.perf_counter() - g.request_start, endpoint=endpoint)
+    HTTP_REQUESTS.inc(endpoint=endpoint, status=response.status_code)
+    return response
+
+
 @app.route('/scrape', methods=['POST'])
 def scrape_professor():
     # Get the URL from the request
@@ -28,112 +124,157 @@ def scrape_professor():
 
     if not url:
         return jsonify({'error': 'No URL provided'}), 400
+    if not is_http_url(url):
+        return jsonify({'error': 'URL must be an http(s) URL'}), 400
+
+    # Fetch the raw HTML content and extract the professor's details
+    try:
+        html_content = fetcher.fetch(url)
+    except requests.RequestException as e:
+        return jsonify({'error': f'Failed to fetch URL: {e}'}), 502
+    try:
+        professor = parse_professor(html_content)
+    except (AttributeError, IndexError) as e:
+        return jsonify({'error': f'Could not parse professor page: {e}'}), 422
+
+    # Embed the combined information and store it as a single vector in the index
+    upserted = indexer.index_professors([professor])
+
+    # Return the JSON structure
+    return jsonify({"professors": [professor], "upserted": upserted, "cache": embedding_cache.stats()})
 
-    # Make a GET request to fetch the raw HTML content
-    response = requests.get(url)
-    html_content = response.text
 
-    # Parse the HTML content with BeautifulSoup
-    soup = BeautifulSoup(html_content, 'html.parser')
+@app.route('/scrape/batch', methods=['POST'])
+def scrape_professors_batch():
+    # Get the URLs from the request
+    data = request.json or {}
+    urls = data.get('urls')
 
-    # Helper functions (same as before)
-    def get_text_or_na(soup_element):
-        return soup_element.get_text(strip=True) if soup_element else 'N/A'
+    if not urls or not isinstance(urls, list):
+        return jsonify({'error': 'No URLs provided'}), 400
+    if len(urls) > MAX_BATCH_URLS:
+        return jsonify({'error': f'At most {MAX_BATCH_URLS} URLs per batch'}), 400
 
-    def safe_int(value):
+    # Fetch every page concurrently; failures are reported per URL
+    results = []
+    professors = []
+    for url, html_content, error in fetcher.fetch_many(urls):
+        if error is not None:
+            results.append({"url": url, "status": "error", "error": error})
+            continue
         try:
-            return int(value)
-        except (ValueError, TypeError):
-            return 'N/A'
+            professor = parse_professor(html_content)
+        except (AttributeError, IndexError) as e:
+            results.append({"url": url, "status": "error", "error": f"Could not parse professor page: {e}"})
+            continue
+        results.append({"url": url, "status": "ok", "professor": professor})
+        professors.append(professor)
 
-    def safe_float(value):
+    # Embed every parsed professor in one batched call and upsert in bounded chunks
+    upserted = indexer.index_professors(professors) if professors else 0
+
+    return jsonify({
+        "results": results,
+        "succeeded": len(professors),
+        "failed": len(results) - len(professors),
+        "upserted": upserted,
+        "cache": embedding_cache.stats(),
+    })
+
+
+@app.route('/scrape/jobs', methods=['POST'])
+def enqueue_scrape_jobs():
+    # Accepts {"url": ...} or {"urls": [...]} and returns immediately with job IDs
+    data = request.json or {}
+    urls = data.get('urls') or ([data['url']] if data.get('url') else None)
+
+    if not urls or not isinstance(urls, list):
+        return jsonify({'error': 'No URL provided'}), 400
+    if len(urls) > MAX_BATCH_URLS:
+        return jsonify({'error': f'At most {MAX_BATCH_URLS} URLs per request'}), 400
+    invalid = [url for url in urls if not is_http_url(url)]
+    if invalid:
+        return jsonify({'error': 'Every URL must be an http(s) URL', 'invalid': invalid}), 400
+
+    jobs = []
+    for url in urls:
+        job_id, duplicate = job_queue.enqueue(url)
+        jobs.append({"job_id": job_id, "url": url, "duplicate": duplicate})
+    return jsonify({"jobs": jobs}), 202
+
+
+@app.route('/scrape/jobs/<job_id>', methods=['GET'])
+def scrape_job_status(job_id):
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job)
+
+
+@app.route('/query', methods=['POST'])
+def query_professors_endpoint():
+    data = request.json or {}
+    text = data.get('query')
+    top_k = data.get('top_k', 10)
+    filter = data.get('filter')
+
+    if not text or not isinstance(text, str):
+        return jsonify({'error': 'No query provided'}), 400
+    if not isinstance(top_k, int) or not 1 <= top_k <= 100:
+        return jsonify({'error': 'top_k must be an integer between 1 and 100'}), 400
+    if filter is not None:
         try:
-            return float(value)
-        except (ValueError, TypeError):
-            return 'N/A'
-
-    # Extract the professor's name
-    professor_name = get_text_or_na(soup.find('div', class_='NameTitle__Name-dowf0z-0'))
-
-    # Extract the department
-    department = get_text_or_na(soup.find('div', class_='NameTitle__Title-dowf0z-1').find('a'))
-
-    # Extract the school name
-    school_name = get_text_or_na(soup.find('div', class_='NameTitle__Title-dowf0z-1').find_all('a')[1])
-
-    # Extract the overall rating
-    overall_rating = safe_float(get_text_or_na(soup.find('div', class_='RatingValue__Numerator-qw8sqy-2')))
-
-    # Extract the number of ratings
-    num_ratings = safe_int(get_text_or_na(soup.find('div', class_='RatingValue__NumRatings-qw8sqy-0').find('a')).replace("ratings", "").strip())
-
-    # Extract the percentage of students who would take again
-    take_again_element = soup.find('div', string="Would take again").find_previous_sibling('div')
-    take_again = safe_int(get_text_or_na(take_again_element).replace('%', ''))
-
-    # Extract the level of difficulty
-    difficulty_element = soup.find('div', string="Level of Difficulty").find_previous_sibling('div')
-    difficulty = safe_float(get_text_or_na(difficulty_element))
-
-    # Extract the top tags and ensure uniqueness
-    tags_container = soup.find('div', class_='TeacherTags__TagsContainer-sc-16vmh1y-0 dbxJaW')
-    top_tags = [get_text_or_na(tag) for tag in tags_container.find_all('span', class_='Tag-bs9vf4-0 hHOVKF')] if tags_container else ['N/A']
-
-    # Extract the reviews
-    reviews = []
-    review_list = soup.find_all('div', class_='Rating__StyledRating-sc-1rhvpxz-1')
-
-    for review in review_list:
-        comment = get_text_or_na(review.find('div', class_='Comments__StyledComments-dzzyvm-0'))
-        reviews.append(comment)
-
-    # Combine all relevant information about the professor into a single string
-    combined_info = f"{professor_name} teaches in the {department} department at {school_name}. "
-    combined_info += f"Overall quality: {overall_rating}, Number of ratings: {num_ratings}, "
-    combined_info += f"Would take again percentage: {take_again}%, Level of difficulty: {difficulty}. "
-    combined_info += f"Top tags: {', '.join(top_tags)}. Reviews: {' | '.join(reviews)}"
-
-    # Embed the combined information
-    professor_embedding = model.encode(combined_info)
-
-    # Store the combined information as a single vector in Pinecone
-    index.upsert(
-        vectors=[{
-            "values": professor_embedding.tolist(),
-            "id": f"{professor_name}_info".replace(" ", "_"),
-            "metadata": {
-                "type": "professor_info",
-                "professor_name": professor_name,
-                "department": department,
-                "school": school_name,
-                "overall_quality": overall_rating,
-                "number_of_ratings": num_ratings,
-                "would_take_again_percentage": take_again,
-                "level_of_difficulty": difficulty,
-                "top_tags": top_tags,
-                "reviews": reviews
-            }
-        }],
-        namespace="ns1",
-    )
+            validate_filter(filter)
+        except ValueError as e:
+            return jsonify({'error': f'Invalid filter: {e}'}), 400
 
-    # Return the JSON structure
-    professor_data = {
-        "professors": [
-            {
-                "name": professor_name,
-                "department": department,
-                "school": school_name,
-                "overall_quality": overall_rating,
-                "number_of_ratings": num_ratings,
-                "would_take_again_percentage": take_again,
-                "level_of_difficulty": difficulty,
-                "top_tags": top_tags,
-                "reviews": reviews
-            }
-        ]
-    }
-    return jsonify(professor_data)
+    start = time.perf_counter()
+
+    # Embed the query with the same model used for indexing, reusing earlier embeddings
+    normalized = normalize_query(text)
+    embedding = query_embedding_cache.get(normalized)
+    embedding_hit = embedding is not None
+    if not embedding_hit:
+        with stage("query_embed"):
+            embedding = embedding_service.encode([normalized])[0]
+        query_embedding_cache.put(normalized, embedding)
+    embedded = time.perf_counter()
+
+    # Search the index unless an identical query was answered since the last upsert
+    key = result_key(embedding, filter, top_k)
+    generation = query_result_cache.generation
+    matches = query_result_cache.get(key)
+    result_hit = matches is not None
+    if not result_hit:
+        with stage("query_search"):
+            matches = query_professors(index, embedding.tolist(), review_store, top_k=top_k, filter=filter)
+        query_result_cache.put(key, matches, generation=generation)
+    searched = time.perf_counter()
+
+    return jsonify({
+        "matches": matches,
+        "cache": {"embedding_hit": embedding_hit, "result_hit": result_hit},
+        "timings_ms": {
+            "embed": (embedded - start) * 1000,
+            "search": (searched - embedded) * 1000,
+            "total": (searched - start) * 1000,
+        },
+    })
+
+
+@app.route('/embedding/stats', methods=['GET'])
+def embedding_stats():
+    return jsonify({
+        "service": embedding_service.stats(),
+        "cache": embedding_cache.stats(),
+        "query_embedding_cache": query_embedding_cache.stats(),
+        "query_result_cache": query_result_cache.stats(),
+    })
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    return Response(REGISTRY.render(), mimetype="text/plain; version=0.0.4")
 
 
 if __name__ == '__main__':
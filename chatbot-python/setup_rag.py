@@ -1,68 +1,170 @@
 from dotenv import load_dotenv
 import os
 import json
-from pinecone import Pinecone, ServerlessSpec
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+import ijson
 from sentence_transformers import SentenceTransformer
+from embedding_cache import EmbeddingCache
+from indexing import Indexer
+from metrics import stage_summary
+from professors import MODEL_NAME
+from review_store import ReviewStore
+from vector_store import open_index, ensure_index, batched, index_identity
 
 # Load environment variables
 load_dotenv()
 
-# Initialize Pinecone
-pc = Pinecone(api_key=os.getenv("PINECONE_API_KEY"))
-
-# Create a Pinecone index for RAG4
-pc.create_index(
-    name="rag4",
-    dimension=384,  # Match the embedding dimension of the model used
-    metric="cosine",
-    spec=ServerlessSpec(cloud="aws", region="us-east-1"),
-)
-
-# Load the review data from reviews.json
-with open("reviews.json") as f:
-    data = json.load(f)
-
-processed_data = []
-
-# Initialize Sentence Transformer model
-model = SentenceTransformer('all-MiniLM-L6-v2')  # This model outputs 384-dimensional embeddings
-
-# Iterate through each professor in the data
-for professor in data["professors"]:
-    # Combine all relevant information about the professor into a single string
-    combined_info = f"{professor['name']} teaches in the {professor['department']} department at {professor['school']}. "
-    combined_info += f"Overall quality: {professor['overall_quality']}, Number of ratings: {professor['number_of_ratings']}, "
-    combined_info += f"Would take again percentage: {professor['would_take_again_percentage']}%, Level of difficulty: {professor['level_of_difficulty']}. "
-    combined_info += f"Top tags: {', '.join(professor['top_tags'])}. Reviews: {' | '.join(professor['reviews'])}"
-
-    # Create an embedding for the combined information
-    professor_embedding = model.encode(combined_info)
-
-    # Store the combined information as a single vector in Pinecone
-    processed_data.append({
-        "values": professor_embedding.tolist(),
-        "id": f"{professor['name']}_info".replace(" ", "_"),
-        "metadata": {
-            "type": "professor_info",
-            "professor_name": professor["name"],
-            "department": professor["department"],
-            "school": professor["school"],
-            "overall_quality": professor["overall_quality"],
-            "number_of_ratings": professor["number_of_ratings"],
-            "would_take_again_percentage": professor["would_take_again_percentage"],
-            "level_of_difficulty": professor["level_of_difficulty"],
-            "top_tags": professor["top_tags"],
-            "reviews": professor["reviews"]
-        }
-    })
-
-# Insert the embeddings into the Pinecone index
-index = pc.Index("rag4")
-upsert_response = index.upsert(
-    vectors=processed_data,
-    namespace="ns1",
-)
-print(f"Upserted count: {upsert_response['upserted_count']}")
-
-# Print index statistics
-print(index.describe_index_stats())
+INDEX_NAME = "rag4"
+NAMESPACE = "ns1"
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Stream reviews.json into the vector index")
+    parser.add_argument("--input", default="reviews.json", help="Path to the reviews JSON file")
+    parser.add_argument("--encode-batch-size", type=int, default=int(os.getenv("ENCODE_BATCH_SIZE", 64)),
+                        help="Number of professors encoded per model.encode call")
+    parser.add_argument("--upsert-batch-size", type=int, default=int(os.getenv("UPSERT_BATCH_SIZE", 100)),
+                        help="Maximum number of vectors sent per index.upsert call")
+    parser.add_argument("--checkpoint", default="ingest_checkpoint.json",
+                        help="File recording how many professors have been upserted so far")
+    parser.add_argument("--no-resume", action="store_true", help="Ignore an existing checkpoint and start over")
+    parser.add_argument("--cache", default=os.getenv("EMBEDDING_CACHE_PATH", "embedding_cache.db"),
+                        help="Path to the on-disk embedding cache")
+    parser.add_argument("--cache-max-entries", type=int, default=int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", 100000)),
+                        help="Number of cached embeddings kept before the least recently used are evicted")
+    parser.add_argument("--incremental", action="store_true", default=os.getenv("INCREMENTAL_INDEXING", "0") == "1",
+                        help="Skip the upsert for professors whose text and metadata are unchanged")
+    parser.add_argument("--index-mode", choices=("professor", "chunked"), default=os.getenv("INDEX_MODE", "professor"),
+                        help="One vector per professor, or a summary vector plus per-review chunk vectors")
+    parser.add_argument("--review-store", default=os.getenv("REVIEW_STORE_PATH", "review_store.db"),
+                        help="Side store holding review text in chunked mode")
+    return parser.parse_args()
+
+
+def iter_professors(path):
+    # Stream professors one at a time instead of loading the whole file
+    with open(path, "rb") as f:
+        for professor in ijson.items(f, "professors.item", use_float=True):
+            yield professor
+
+
+def checkpoint_source(args):
+    # A checkpoint only applies to the exact input file, target index and index
+    # mode it was written for
+    stat = os.stat(args.input)
+    return {
+        "input": os.path.abspath(args.input),
+        "size": stat.st_size,
+        "mtime": stat.st_mtime,
+        "target": index_identity(INDEX_NAME),
+        "index_mode": args.index_mode,
+    }
+
+
+def load_checkpoint(path, source):
+    if not os.path.exists(path):
+        return 0
+    with open(path) as f:
+        checkpoint = json.load(f)
+    if checkpoint.get("source") != source:
+        print(f"Ignoring checkpoint {path}: it was written for a different input file or index")
+        return 0
+    return checkpoint.get("processed", 0)
+
+
+def save_checkpoint(path, source, processed):
+    # Write to a temporary file first so a crash never leaves a truncated checkpoint
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"processed": processed, "source": source}, f)
+    os.replace(tmp_path, path)
+
+
+def ingest(indexer, cache, args):
+    source = checkpoint_source(args)
+    skip = 0 if args.no_resume else load_checkpoint(args.checkpoint, source)
+    if skip:
+        print(f"Resuming from checkpoint: skipping {skip} professors already upserted")
+
+    professors = islice(iter_professors(args.input), skip, None)
+    processed = skip
+    upserted = 0
+    start = time.perf_counter()
+
+    # A single upsert worker lets the next batch encode while the previous one is in flight
+    with ThreadPoolExecutor(max_workers=1) as upsert_pool:
+        pending = None
+        for batch in batched(professors, args.encode_batch_size):
+            records, vectors = indexer.embed(batch)
+
+            if pending is not None:
+                upserted += pending.result()
+                save_checkpoint(args.checkpoint, source, processed)
+            pending = upsert_pool.submit(indexer.upsert, batch, records, vectors)
+            processed += len(batch)
+
+            elapsed = time.perf_counter() - start
+            rate = (processed - skip) / elapsed if elapsed > 0 else 0.0
+            print(f"Encoded {processed} professors ({rate:.1f} professors/s)")
+
+        if pending is not None:
+            upserted += pending.result()
+
+    # The run finished, so the next one (e.g. a nightly re-ingestion) starts from the top
+    if os.path.exists(args.checkpoint):
+        os.remove(args.checkpoint)
+
+    elapsed = time.perf_counter() - start
+    rate = (processed - skip) / elapsed if elapsed > 0 else 0.0
+    print(f"Upserted count: {upserted} in {elapsed:.1f}s ({rate:.1f} professors/s)")
+    stats = cache.stats()
+    print(f"Embedding cache: {stats['hits']} hits, {stats['misses']} misses, "
+          f"{stats['skipped_upserts']} unchanged vectors skipped")
+    # Per-stage latency, throughput and error counts for the whole run
+    print(json.dumps({
+        "professors": processed - skip,
+        "upserted": upserted,
+        "elapsed_seconds": round(elapsed, 3),
+        "professors_per_second": round(rate, 2),
+        "embedding_cache": stats,
+        "stages": stage_summary(),
+    }, indent=2))
+    return upserted
+
+
+def main():
+    args = parse_args()
+
+    # Create the index unless a previous run already did (no-op for the local store)
+    ensure_index(INDEX_NAME)
+
+    # Initialize Sentence Transformer model
+    model = SentenceTransformer(MODEL_NAME)
+    cache = EmbeddingCache(args.cache, MODEL_NAME, max_entries=args.cache_max_entries)
+
+    index = open_index(INDEX_NAME)
+    review_store = ReviewStore(args.review_store) if args.index_mode == "chunked" else None
+    indexer = Indexer(
+        index,
+        cache,
+        lambda texts: model.encode(texts, batch_size=args.encode_batch_size),
+        mode=args.index_mode,
+        review_store=review_store,
+        incremental=args.incremental,
+        namespace=NAMESPACE,
+        upsert_batch_size=args.upsert_batch_size,
+        target=index_identity(INDEX_NAME),
+    )
+    ingest(indexer, cache, args)
+
+    # Print index statistics
+    print(index.describe_index_stats())
+    if review_store is not None:
+        print(f"Review store: {review_store.stats()}")
+
+
+if __name__ == "__main__":
+    main()
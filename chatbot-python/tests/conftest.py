@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Allow the tests to import the chatbot-python modules directly
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,55 @@
+import threading
+
+import numpy as np
+import pytest
+
+from embedding_service import EmbeddingService
+
+
+class FakeModel:
+    # Encodes each text as [len(text)]; encode() can be held to let requests pile up
+    def __init__(self):
+        self.release = threading.Event()
+        self.release.set()
+        self.batches = []
+
+    def encode(self, texts, batch_size=None):
+        self.release.wait()
+        self.batches.append(list(texts))
+        if "boom" in texts:
+            raise RuntimeError("boom")
+        return np.array([[len(text)] for text in texts], dtype=np.float32)
+
+
+def test_requests_are_split_back_per_caller():
+    service = EmbeddingService(FakeModel(), max_batch_size=8, max_wait_ms=50)
+    first = service.submit(["a", "bb"])
+    second = service.submit(["ccc"])
+
+    assert first.result(timeout=5).tolist() == [[1], [2]]
+    assert second.result(timeout=5).tolist() == [[3]]
+    assert service.encode([]).shape == (0, 0)
+
+
+def test_cancelled_request_does_not_stop_the_worker():
+    model = FakeModel()
+    service = EmbeddingService(model, max_batch_size=8, max_wait_ms=1)
+
+    # Hold the worker inside encode() so the next request is still queued when cancelled
+    model.release.clear()
+    busy = service.submit(["held"])
+    cancelled = service.submit(["never"])
+    assert cancelled.cancel()
+    model.release.set()
+
+    assert busy.result(timeout=5).tolist() == [[4]]
+    assert service.submit(["after"]).result(timeout=5).tolist() == [[5]]
+    assert ["never"] not in model.batches
+
+
+def test_encode_errors_reach_every_caller_and_worker_continues():
+    service = EmbeddingService(FakeModel(), max_batch_size=8, max_wait_ms=1)
+
+    with pytest.raises(RuntimeError):
+        service.encode(["boom"])
+    assert service.encode(["ok"]).tolist() == [[2]]
@@ -0,0 +1,57 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from jobs import JobQueue
+
+
+def test_enqueue_deduplicates_pending_urls(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.db"))
+    job_id, duplicate = queue.enqueue("https://example.com/a")
+    assert not duplicate
+    assert queue.enqueue("https://example.com/a") == (job_id, True)
+
+    # Once the job has finished the URL can be queued again
+    queue.update(job_id, "done")
+    new_id, duplicate = queue.enqueue("https://example.com/a")
+    assert not duplicate and new_id != job_id
+
+
+def test_claim_hands_each_job_to_one_queue(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    first = JobQueue(path)
+    urls = [f"https://example.com/{i}" for i in range(50)]
+    for url in urls:
+        first.enqueue(url)
+    # A second process on the same database sees the queued jobs when it starts
+    second = JobQueue(path)
+
+    def drain(queue):
+        claimed = []
+        while True:
+            job = queue.claim(timeout=0)
+            if job is None:
+                return claimed
+            claimed.append(job[1])
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        results = list(pool.map(drain, [first, second]))
+
+    claimed = results[0] + results[1]
+    assert sorted(claimed) == sorted(urls)
+    assert first.stats()["fetching"] == 50
+    assert first.claim(timeout=0) is None
+
+
+def test_restart_requeues_only_stale_jobs(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    queue = JobQueue(path)
+    job_id, _ = queue.enqueue("https://example.com/a")
+    assert queue.claim(timeout=0)[0] == job_id
+
+    # Another process starting while the job is in flight leaves it alone
+    JobQueue(path)
+    assert queue.get(job_id)["status"] == "fetching"
+
+    # A process starting after the owner went quiet takes the job back
+    restarted = JobQueue(path, stale_after=0)
+    assert restarted.get(job_id)["status"] == "queued"
+    assert restarted.claim(timeout=0)[0] == job_id
@@ -0,0 +1,116 @@
+import multiprocessing
+
+import numpy as np
+import pytest
+
+from vector_store import LocalIndex
+
+DIMENSION = 8
+
+
+def vector(vector_id, seed, **metadata):
+    values = np.random.default_rng(seed).standard_normal(DIMENSION).tolist()
+    return {"id": vector_id, "values": values, "metadata": metadata}
+
+
+@pytest.fixture
+def vectors():
+    return [
+        vector("a", 1, school="MIT", overall_quality=4.5),
+        vector("b", 2, school="MIT", overall_quality="N/A"),
+        vector("c", 3, school="CMU", overall_quality="3"),
+    ]
+
+
+def test_query_with_fewer_vectors_than_top_k(tmp_path, vectors):
+    index = LocalIndex(str(tmp_path), dimension=DIMENSION, initial_capacity=4)
+    index.upsert(vectors, namespace="ns1")
+
+    matches = index.query(vectors[1]["values"], top_k=10, namespace="ns1", include_metadata=True)["matches"]
+
+    assert [match["id"] for match in matches][0] == "b"
+    assert sorted(match["id"] for match in matches) == ["a", "b", "c"]
+    assert matches[0]["score"] == pytest.approx(1.0, abs=1e-5)
+    assert matches[0]["metadata"] == {"school": "MIT", "overall_quality": "N/A"}
+
+
+def test_upsert_replaces_existing_ids(tmp_path, vectors):
+    index = LocalIndex(str(tmp_path), dimension=DIMENSION)
+    index.upsert(vectors, namespace="ns1")
+    index.upsert([vector("a", 4, school="CMU")], namespace="ns1")
+
+    assert index.describe_index_stats()["total_vector_count"] == 3
+    assert index.fetch(["a"], namespace="ns1")["vectors"]["a"]["metadata"] == {"school": "CMU"}
+
+
+def test_query_filters(tmp_path, vectors):
+    index = LocalIndex(str(tmp_path), dimension=DIMENSION)
+    index.upsert(vectors, namespace="ns1")
+
+    def ids(filter):
+        return sorted(match["id"] for match in index.query(vectors[0]["values"], namespace="ns1", filter=filter)["matches"])
+
+    assert ids({"school": "MIT"}) == ["a", "b"]
+    assert ids({"school": {"$in": ["CMU"]}}) == ["c"]
+    # Ratings stored as strings still compare numerically; "N/A" never matches a range
+    assert ids({"overall_quality": {"$gte": 3}}) == ["a", "c"]
+    assert ids({"$or": [{"school": "CMU"}, {"overall_quality": {"$gt": 4}}]}) == ["a", "c"]
+    for invalid in ({"school": {"$bogus": 1}}, "x", {"$and": "x"}, {"school": {"$in": "MIT"}}):
+        with pytest.raises(ValueError):
+            ids(invalid)
+
+
+def test_delete_keeps_rows_dense(tmp_path, vectors):
+    index = LocalIndex(str(tmp_path), dimension=DIMENSION)
+    index.upsert(vectors, namespace="ns1")
+    index.delete(["a"], namespace="ns1")
+
+    matches = index.query(vectors[2]["values"], top_k=10, namespace="ns1")["matches"]
+    assert sorted(match["id"] for match in matches) == ["b", "c"]
+    assert matches[0]["id"] == "c"
+
+
+def test_reopen_sees_stored_vectors(tmp_path, vectors):
+    LocalIndex(str(tmp_path), dimension=DIMENSION).upsert(vectors, namespace="ns1")
+
+    reopened = LocalIndex(str(tmp_path), dimension=DIMENSION)
+    assert reopened.describe_index_stats()["total_vector_count"] == 3
+    assert reopened.query(vectors[2]["values"], top_k=1, namespace="ns1")["matches"][0]["id"] == "c"
+
+    with pytest.raises(ValueError):
+        LocalIndex(str(tmp_path), dimension=DIMENSION, dtype="float16")
+
+
+def test_query_sees_rows_added_by_another_instance(tmp_path, vectors):
+    reader = LocalIndex(str(tmp_path), dimension=DIMENSION, initial_capacity=2)
+    reader.upsert(vectors[:1], namespace="ns1")
+    assert reader.query(vectors[0]["values"], namespace="ns1")["matches"][0]["id"] == "a"
+
+    # A second writer grows the backing file past the reader's mapping
+    writer = LocalIndex(str(tmp_path), dimension=DIMENSION, initial_capacity=2)
+    writer.upsert(vectors[1:] + [vector(f"extra{i}", 10 + i, school="MIT") for i in range(4)], namespace="ns1")
+
+    matches = reader.query(vectors[2]["values"], top_k=1, namespace="ns1", filter={"school": "CMU"})["matches"]
+    assert matches[0]["id"] == "c"
+    assert matches[0]["score"] == pytest.approx(1.0, abs=1e-5)
+
+
+def upsert_from_process(path, prefix, count):
+    index = LocalIndex(path, dimension=DIMENSION, initial_capacity=2)
+    for i in range(count):
+        index.upsert([vector(f"{prefix}{i}", i, writer=prefix)], namespace="ns1")
+
+
+def test_concurrent_writers_get_distinct_rows(tmp_path):
+    context = multiprocessing.get_context("spawn")
+    writers = [context.Process(target=upsert_from_process, args=(str(tmp_path), prefix, 100)) for prefix in "xy"]
+    for writer in writers:
+        writer.start()
+    for writer in writers:
+        writer.join()
+        assert writer.exitcode == 0
+
+    index = LocalIndex(str(tmp_path), dimension=DIMENSION)
+    rows = [row for (row,) in index._db.execute("SELECT row FROM vectors WHERE namespace = 'ns1'")]
+    assert len(rows) == 200
+    assert sorted(rows) == list(range(200))
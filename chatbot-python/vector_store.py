@@ -0,0 +1,398 @@
+from dotenv import load_dotenv
+import os
+import json
+import sqlite3
+import threading
+from contextlib import contextmanager
+from itertools import islice
+import numpy as np
+from metrics import stage
+
+# Load environment variables
+load_dotenv()
+
+DIMENSION = 384  # all-MiniLM-L6-v2 embedding size
+
+# Pinecone metadata filter operators and their SQL equivalents
+FILTER_OPERATORS = {
+    "$eq": "=",
+    "$ne": "!=",
+    "$gt": ">",
+    "$gte": ">=",
+    "$lt": "<",
+    "$lte": "<=",
+}
+RANGE_OPERATORS = {"$gt", "$gte", "$lt", "$lte"}
+
+
+def open_index(name="rag4"):
+    # Pick the vector store backend from configuration so ingestion, the Flask
+    # service and benchmarks can run fully offline with VECTOR_STORE=local
+    backend = os.getenv("VECTOR_STORE", "pinecone").lower()
+    if backend == "pinecone":
+        from pinecone import Pinecone
+        pc = Pinecone(api_key=os.getenv("PINECONE_API_KEY"))
+        return pc.Index(name)
+    if backend == "local":
+        path = os.getenv("VECTOR_STORE_PATH", "vector_store")
+        dtype = os.getenv("VECTOR_STORE_DTYPE", "float32")
+        return LocalIndex(os.path.join(path, name), dimension=DIMENSION, dtype=dtype)
+    if backend == "memory":
+        # Nothing touches disk; used by the load-test harness and throwaway dev runs
+        return LocalIndex(None, dimension=DIMENSION, dtype=os.getenv("VECTOR_STORE_DTYPE", "float32"))
+    raise ValueError(f"Unknown VECTOR_STORE backend: {backend}")
+
+
+def index_identity(name="rag4"):
+    # Names the store open_index(name) writes to, e.g. "local:/srv/vector_store/rag4",
+    # so state recorded against one store is never applied to another
+    backend = os.getenv("VECTOR_STORE", "pinecone").lower()
+    if backend == "local":
+        path = os.getenv("VECTOR_STORE_PATH", "vector_store")
+        return f"local:{os.path.abspath(os.path.join(path, name))}"
+    return f"{backend}:{name}"
+
+
+def ensure_index(name="rag4"):
+    # Only Pinecone needs the index created up front; local stores create themselves on open
+    if os.getenv("VECTOR_STORE", "pinecone").lower() != "pinecone":
+        return
+    from pinecone import Pinecone, ServerlessSpec
+    pc = Pinecone(api_key=os.getenv("PINECONE_API_KEY"))
+    if name not in pc.list_indexes().names():
+        pc.create_index(
+            name=name,
+            dimension=DIMENSION,  # Match the embedding dimension of the model used
+            metric="cosine",
+            spec=ServerlessSpec(cloud="aws", region="us-east-1"),
+        )
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def upsert_chunks(index, vectors, chunk_size=100, namespace="ns1"):
+    # Keep each upsert request under the backend's payload limits
+    upserted = 0
+    for chunk in batched(vectors, chunk_size):
+        with stage("upsert", items=len(chunk)):
+            upsert_response = index.upsert(vectors=chunk, namespace=namespace)
+        upserted += upsert_response["upserted_count"]
+    return upserted
+
+
+def _flush(matrix):
+    if isinstance(matrix, np.memmap):
+        matrix.flush()
+
+
+def validate_filter(filter):
+    # Raises ValueError for filters the local store cannot evaluate, so callers can
+    # reject them up front whichever backend is configured
+    _filter_to_sql(filter)
+
+
+def _check_scalar(op, value):
+    if not isinstance(value, (str, int, float, bool)):
+        raise ValueError(f"{op} needs a string, number or boolean, not {type(value).__name__}")
+
+
+def _filter_to_sql(filter):
+    # Translate a Pinecone-style metadata filter into a SQL WHERE clause
+    if not isinstance(filter, dict):
+        raise ValueError(f"Filter must be an object, not {type(filter).__name__}")
+    clauses = []
+    params = []
+    for field, condition in filter.items():
+        if field in ("$and", "$or") and not isinstance(condition, list):
+            raise ValueError(f"{field} needs a list of filters")
+        if field == "$and":
+            for sub_filter in condition:
+                sub_clause, sub_params = _filter_to_sql(sub_filter)
+                clauses.append(f"({sub_clause})")
+                params.extend(sub_params)
+            continue
+        if field == "$or":
+            sub_clauses = []
+            for sub_filter in condition:
+                sub_clause, sub_params = _filter_to_sql(sub_filter)
+                sub_clauses.append(f"({sub_clause})")
+                params.extend(sub_params)
+            clauses.append(f"({' OR '.join(sub_clauses)})")
+            continue
+
+        if not isinstance(condition, dict):
+            condition = {"$eq": condition}
+        column = "json_extract(metadata, ?)"
+        path = f'$."{field}"'
+        for op, value in condition.items():
+            if op in ("$in", "$nin"):
+                if not isinstance(value, list):
+                    raise ValueError(f"{op} needs a list of values")
+                for item in value:
+                    _check_scalar(op, item)
+                placeholders = ", ".join("?" for _ in value)
+                negate = "NOT " if op == "$nin" else ""
+                clauses.append(f"{column} {negate}IN ({placeholders})")
+                params.extend([path, *value])
+            elif op in RANGE_OPERATORS:
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    raise ValueError(f"{op} needs a number")
+                # Ratings are sometimes stored as strings ("75") or "N/A", so
+                # compare numerically and skip values that are not numbers
+                clauses.append(
+                    f"(CAST({column} AS TEXT) GLOB '[0-9]*' AND CAST({column} AS REAL) {FILTER_OPERATORS[op]} ?)"
+                )
+                params.extend([path, path, value])
+            elif op in FILTER_OPERATORS:
+                _check_scalar(op, value)
+                clauses.append(f"{column} {FILTER_OPERATORS[op]} ?")
+                params.extend([path, value])
+            else:
+                raise ValueError(f"Unsupported filter operator: {op}")
+    return " AND ".join(clauses) or "1", params
+
+
+class LocalIndex:
+    # Vectors live in a memory-mapped matrix (one row per vector, L2-normalised so
+    # cosine similarity is a dot product) and metadata lives in a SQLite side store.
+    # Re-opening only maps the file, so large indexes open without a full load.
+    # With path=None everything is kept in memory instead.
+
+    def __init__(self, path, dimension=DIMENSION, dtype="float32", initial_capacity=1024):
+        if dtype not in ("float32", "float16"):
+            raise ValueError(f"Unsupported vector dtype: {dtype}")
+        if path is not None:
+            os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.dimension = dimension
+        self.dtype = np.dtype(dtype)
+        self.initial_capacity = initial_capacity
+        self._lock = threading.RLock()
+        db_path = os.path.join(path, "metadata.db") if path is not None else ":memory:"
+        # Writers from other processes (e.g. setup_rag.py next to the service) wait for the lock
+        self._db = sqlite3.connect(db_path, timeout=60, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS vectors ("
+            "namespace TEXT NOT NULL, id TEXT NOT NULL, row INTEGER NOT NULL, metadata TEXT, "
+            "PRIMARY KEY (namespace, id))"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS vectors_row ON vectors (namespace, row)")
+        self._db.execute("CREATE TABLE IF NOT EXISTS settings (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self._db.executemany(
+            "INSERT OR IGNORE INTO settings (key, value) VALUES (?, ?)",
+            [("dimension", str(dimension)), ("dtype", self.dtype.name)],
+        )
+        self._db.commit()
+        settings = dict(self._db.execute("SELECT key, value FROM settings"))
+        if settings["dimension"] != str(dimension) or settings["dtype"] != self.dtype.name:
+            raise ValueError(
+                f"Index at {path} was created with dimension {settings['dimension']} and dtype "
+                f"{settings['dtype']}, not {dimension} and {self.dtype.name}"
+            )
+        self._matrices = {}
+
+    def _matrix_path(self, namespace):
+        return os.path.join(self.path, f"{namespace}.{self.dtype.name}")
+
+    def _matrix(self, namespace, min_rows=0):
+        matrix = self._matrices.get(namespace)
+        if matrix is not None and matrix.shape[0] >= min_rows:
+            return matrix
+
+        if self.path is None:
+            capacity = matrix.shape[0] if matrix is not None else self.initial_capacity
+            while capacity < min_rows:
+                capacity *= 2
+            grown = np.zeros((capacity, self.dimension), dtype=self.dtype)
+            if matrix is not None:
+                grown[:matrix.shape[0]] = matrix
+            self._matrices[namespace] = grown
+            return grown
+
+        path = self._matrix_path(namespace)
+        row_bytes = self.dimension * self.dtype.itemsize
+        current_rows = os.path.getsize(path) // row_bytes if os.path.exists(path) else 0
+        capacity = max(current_rows, self.initial_capacity)
+        while capacity < min_rows:
+            capacity *= 2
+        if capacity != current_rows:
+            # Grow the backing file geometrically; new rows read back as zeros
+            with open(path, "ab") as f:
+                f.truncate(capacity * row_bytes)
+        if matrix is not None:
+            _flush(matrix)
+        matrix = np.memmap(path, dtype=self.dtype, mode="r+", shape=(capacity, self.dimension))
+        self._matrices[namespace] = matrix
+        return matrix
+
+    def _count(self, namespace):
+        return self._db.execute("SELECT COUNT(*) FROM vectors WHERE namespace = ?", (namespace,)).fetchone()[0]
+
+    @contextmanager
+    def _write_transaction(self):
+        # BEGIN IMMEDIATE takes SQLite's write lock before the vector count is read, so
+        # row numbers are assigned and written by one process at a time
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self._db.rollback()
+            raise
+        self._db.commit()
+
+    def upsert(self, vectors, namespace=""):
+        with self._lock, self._write_transaction():
+            next_row = self._count(namespace)
+            assigned = {}
+            for vector in vectors:
+                if vector["id"] in assigned:
+                    continue
+                existing = self._db.execute(
+                    "SELECT row FROM vectors WHERE namespace = ? AND id = ?", (namespace, vector["id"])
+                ).fetchone()
+                if existing is not None:
+                    assigned[vector["id"]] = existing[0]
+                else:
+                    assigned[vector["id"]] = next_row
+                    next_row += 1
+            # Later duplicates of an id within one batch overwrite earlier ones
+            rows = [assigned[vector["id"]] for vector in vectors]
+
+            values = np.asarray([vector["values"] for vector in vectors], dtype=np.float32).reshape(-1, self.dimension)
+            norms = np.linalg.norm(values, axis=1, keepdims=True)
+            values = values / np.where(norms == 0, 1, norms)
+
+            matrix = self._matrix(namespace, min_rows=next_row)
+            for row, value in zip(rows, values.astype(self.dtype)):
+                matrix[row] = value
+            _flush(matrix)
+
+            self._db.executemany(
+                "INSERT OR REPLACE INTO vectors (namespace, id, row, metadata) VALUES (?, ?, ?, ?)",
+                [
+                    (namespace, vector["id"], row, json.dumps(vector.get("metadata", {})))
+                    for vector, row in zip(vectors, rows)
+                ],
+            )
+        return {"upserted_count": len(vectors)}
+
+    def delete(self, ids, namespace=""):
+        # Swap-remove: the last row moves into each freed slot so rows stay dense
+        with self._lock, self._write_transaction():
+            matrix = self._matrix(namespace, min_rows=self._count(namespace))
+            for vector_id in ids:
+                existing = self._db.execute(
+                    "SELECT row FROM vectors WHERE namespace = ? AND id = ?", (namespace, vector_id)
+                ).fetchone()
+                if existing is None:
+                    continue
+                row = existing[0]
+                last_row = self._count(namespace) - 1
+                self._db.execute("DELETE FROM vectors WHERE namespace = ? AND id = ?", (namespace, vector_id))
+                if row != last_row:
+                    matrix[row] = matrix[last_row]
+                    self._db.execute(
+                        "UPDATE vectors SET row = ? WHERE namespace = ? AND row = ?", (row, namespace, last_row)
+                    )
+                matrix[last_row] = 0
+            _flush(matrix)
+        return {}
+
+    def fetch(self, ids, namespace=""):
+        with self._lock:
+            placeholders = ", ".join("?" for _ in ids)
+            records = self._db.execute(
+                f"SELECT id, row, metadata FROM vectors WHERE namespace = ? AND id IN ({placeholders})",
+                (namespace, *ids),
+            ).fetchall()
+            matrix = self._matrix(namespace, min_rows=self._count(namespace))
+            return {
+                "vectors": {
+                    vector_id: {
+                        "id": vector_id,
+                        "values": matrix[row].astype(np.float32).tolist(),
+                        "metadata": json.loads(metadata),
+                    }
+                    for vector_id, row, metadata in records
+                },
+                "namespace": namespace,
+            }
+
+    def query(self, vector, top_k=10, namespace="", filter=None, include_metadata=False, include_values=False,
+              block_rows=65536):
+        query = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm:
+            query = query / norm
+
+        with self._lock:
+            count = self._count(namespace)
+            if count == 0:
+                return {"matches": [], "namespace": namespace}
+            # Another process (e.g. setup_rag.py) may have grown the file since it was mapped
+            matrix = self._matrix(namespace, min_rows=count)
+
+            if filter:
+                where, params = _filter_to_sql(filter)
+                candidate_rows = np.fromiter(
+                    (row for (row,) in self._db.execute(
+                        f"SELECT row FROM vectors WHERE namespace = ? AND {where}", (namespace, *params)
+                    )),
+                    dtype=np.int64,
+                )
+                scores = (matrix[candidate_rows].astype(np.float32) @ query) if len(candidate_rows) else np.empty(0)
+            else:
+                candidate_rows = np.arange(count)
+                # Score in blocks so float16 stores never upcast the whole matrix at once
+                scores = np.concatenate([
+                    matrix[start:min(start + block_rows, count)].astype(np.float32) @ query
+                    for start in range(0, count, block_rows)
+                ])
+
+            k = min(top_k, len(scores))
+            if k == 0:
+                return {"matches": [], "namespace": namespace}
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            top_rows = candidate_rows[top]
+
+            placeholders = ", ".join("?" for _ in top_rows)
+            records = {
+                row: (vector_id, metadata)
+                for vector_id, row, metadata in self._db.execute(
+                    f"SELECT id, row, metadata FROM vectors WHERE namespace = ? AND row IN ({placeholders})",
+                    (namespace, *top_rows.tolist()),
+                )
+            }
+
+            matches = []
+            for row, score in zip(top_rows.tolist(), scores[top].tolist()):
+                vector_id, metadata = records[row]
+                match = {"id": vector_id, "score": score}
+                if include_metadata:
+                    match["metadata"] = json.loads(metadata)
+                if include_values:
+                    match["values"] = matrix[row].astype(np.float32).tolist()
+                matches.append(match)
+        return {"matches": matches, "namespace": namespace}
+
+    def describe_index_stats(self):
+        with self._lock:
+            namespaces = {
+                namespace: {"vector_count": count}
+                for namespace, count in self._db.execute(
+                    "SELECT namespace, COUNT(*) FROM vectors GROUP BY namespace"
+                )
+            }
+        return {
+            "dimension": self.dimension,
+            "namespaces": namespaces,
+            "total_vector_count": sum(ns["vector_count"] for ns in namespaces.values()),
+        }